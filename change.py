@@ -315,35 +315,93 @@ def extract_company_name_from_pdf(pdf_path):
         print(f"상호명 추출 중 오류 발생: {str(e)}")
         return None
 
-def auto_rename_pdf_with_company_name():
-    """
-    가장 최신 PDF 파일을 찾아서 상호명과 등록번호를 추출하고 
-    yymmdd_상호명_등록번호 형식으로 파일명을 변경하는 함수
+def get_download_folder():
+    """test_pay.js에서 다운로드하는 .playwright-mcp 폴더 경로"""
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), ".playwright-mcp")
+
+def extract_certificate_info(pdf_path):
     """
-    try:
-        # 1. 다운로드 폴더에서 가장 최신 PDF 찾기
-        download_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".playwright-mcp")
-        print(f"다운로드 폴더 경로: {download_folder}")
+    PDF에서 상호명과 등록번호를 추출하는 함수
+    
+    Args:
+        pdf_path (str): PDF 파일 경로
         
-        if not os.path.exists(download_folder):
-            print("다운로드 폴더를 찾을 수 없습니다.")
-            return None
-            
-        pdf_files = [f for f in os.listdir(download_folder) if f.lower().endswith(".pdf")]
+    Returns:
+        dict: {"file": 파일명, "company_name": 상호명, "registration_number": 등록번호}
+    
+    Raises:
+        FileNotFoundError: PDF 파일이 없을 때
+        ValueError: 상호명과 등록번호를 모두 추출하지 못했을 때 (읽을 수 없는 PDF 포함)
+    """
+    if not os.path.isfile(pdf_path):
+        raise FileNotFoundError(f"PDF 파일을 찾을 수 없습니다: {pdf_path}")
+    
+    company_name = extract_company_name_from_pdf(pdf_path)
+    registration_number = extract_registration_number_from_pdf(pdf_path)
+    if not company_name and not registration_number:
+        raise ValueError(f"상호명과 등록번호를 추출할 수 없습니다: {os.path.basename(pdf_path)}")
+    
+    return {
+        "file": os.path.basename(pdf_path),
+        "company_name": company_name,
+        "registration_number": registration_number,
+    }
+
+def extract_certificates(pdf_paths):
+    """
+    여러 PDF에서 상호명과 등록번호를 추출하는 함수
+    
+    Args:
+        pdf_paths (list): PDF 파일 경로 목록
         
-        if not pdf_files:
-            print("다운로드 폴더에 PDF 파일이 없습니다.")
-            return None
+    Returns:
+        list: extract_certificate_info 결과 목록 (실패한 파일은 {"file": 파일명, "error": 오류 내용})
+    """
+    results = []
+    for pdf_path in pdf_paths:
+        try:
+            results.append(extract_certificate_info(pdf_path))
+        except (OSError, ValueError) as e:
+            results.append({"file": os.path.basename(pdf_path), "error": str(e)})
+    return results
+
+def index_certificates(download_folder=None):
+    """
+    폴더의 모든 PDF에서 상호명과 등록번호를 추출하여 목록으로 반환하는 함수
+    
+    Args:
+        download_folder (str, optional): PDF 폴더 (None이면 .playwright-mcp 폴더)
         
-        # 가장 최근 파일 찾기
-        latest_file = max(pdf_files, key=lambda x: os.path.getmtime(os.path.join(download_folder, x)))
-        latest_path = os.path.join(download_folder, latest_file)
+    Returns:
+        list: extract_certificates 결과 목록 (파일명 순)
+    
+    Raises:
+        FileNotFoundError: 폴더가 없을 때
+    """
+    download_folder = download_folder or get_download_folder()
+    if not os.path.isdir(download_folder):
+        raise FileNotFoundError(f"다운로드 폴더를 찾을 수 없습니다: {download_folder}")
+    
+    pdf_files = sorted(f for f in os.listdir(download_folder) if f.lower().endswith(".pdf"))
+    return extract_certificates([os.path.join(download_folder, f) for f in pdf_files])
+
+def rename_pdf_with_company_name(pdf_path):
+    """
+    PDF에서 상호명과 등록번호를 추출하여
+    yymmdd_상호명_등록번호 형식으로 파일명을 변경하는 함수
+    
+    Args:
+        pdf_path (str): PDF 파일 경로
         
-        print(f"처리할 파일: {latest_file}")
+    Returns:
+        str: 변경된 파일 경로 (추출 실패 시 None, 변경 실패 시 원래 경로)
+    """
+    try:
+        download_folder = os.path.dirname(pdf_path)
         
-        # 2. 상호명과 등록번호 추출
-        company_name = extract_company_name_from_pdf(latest_path)
-        registration_number = extract_registration_number_from_pdf(latest_path)
+        # 1. 상호명과 등록번호 추출
+        company_name = extract_company_name_from_pdf(pdf_path)
+        registration_number = extract_registration_number_from_pdf(pdf_path)
         
         if not company_name:
             print("상호명을 추출할 수 없습니다.")
@@ -353,33 +411,66 @@ def auto_rename_pdf_with_company_name():
             print("등록번호를 추출할 수 없습니다.")
             return None
         
-        # 3. 현재 날짜(YYMMDD), 상호명, 등록번호로 새 파일명 생성
+        # 2. 현재 날짜(YYMMDD), 상호명, 등록번호로 새 파일명 생성
         current_date = datetime.now().strftime("%y%m%d")  # YYMMDD 형식
         new_name = f"{current_date}_{company_name}_{registration_number}.pdf"
         new_path = os.path.join(download_folder, new_name)
         
         print(f"새 파일명: {new_name}")
         
-        # 4. 파일 이름 변경
-        if latest_path != new_path:
+        # 3. 파일 이름 변경
+        if pdf_path != new_path:
             try:
-                os.rename(latest_path, new_path)
+                os.rename(pdf_path, new_path)
                 print(f"파일 이름 변경 완료: {new_name}")
                 return new_path
             except PermissionError:
                 print(f"파일이 다른 프로그램에서 사용 중입니다. 파일을 닫고 다시 시도해주세요.")
                 print(f"제안된 새 파일명: {new_name}")
-                return latest_path
+                return pdf_path
             except OSError as e:
-                if e.winerror == 32:
+                if getattr(e, "winerror", None) == 32:
                     print(f"파일이 다른 프로그램에서 사용 중입니다. 파일을 닫고 다시 시도해주세요.")
                     print(f"제안된 새 파일명: {new_name}")
                 else:
                     print(f"파일 이름 변경 중 오류 발생: {str(e)}")
-                return latest_path
+                return pdf_path
         else:
             print("파일명이 이미 적절합니다.")
-            return latest_path
+            return pdf_path
+            
+    except Exception as e:
+        print(f"오류가 발생했습니다: {str(e)}")
+        return None
+
+def auto_rename_pdf_with_company_name():
+    """
+    가장 최신 PDF 파일을 찾아서 상호명과 등록번호를 추출하고 
+    yymmdd_상호명_등록번호 형식으로 파일명을 변경하는 함수
+    """
+    try:
+        # 1. 다운로드 폴더에서 가장 최신 PDF 찾기
+        download_folder = get_download_folder()
+        print(f"다운로드 폴더 경로: {download_folder}")
+        
+        if not os.path.exists(download_folder):
+            print("다운로드 폴더를 찾을 수 없습니다.")
+            return None
+            
+        pdf_files = [f for f in os.listdir(download_folder) if f.lower().endswith(".pdf")]
+        
+        if not pdf_files:
+            print("다운로드 폴더에 PDF 파일이 없습니다.")
+            return None
+        
+        # 가장 최근 파일 찾기
+        latest_file = max(pdf_files, key=lambda x: os.path.getmtime(os.path.join(download_folder, x)))
+        latest_path = os.path.join(download_folder, latest_file)
+        
+        print(f"처리할 파일: {latest_file}")
+        
+        # 2. 상호명과 등록번호로 파일명 변경
+        return rename_pdf_with_company_name(latest_path)
             
     except Exception as e:
         print(f"오류가 발생했습니다: {str(e)}")
@@ -2,6 +2,7 @@ const { chromium } = require('playwright');
 const readline = require('readline');
 const fs = require('fs');
 const path = require('path');
+const http = require('http');
 
 // 설정 객체 - 하드코딩된 값들을 중앙 관리
 const CONFIG = {
@@ -39,6 +40,16 @@ const CONFIG = {
         REGISTRY_STATUS: '살아있는 등기',
         BRANCH_TYPE: '전체 본지점',
         WEEKEND_OPTION: 'N'
+    },
+    // Python 잡 러너 (python job_runner.py) 주소
+    JOB_RUNNER: {
+        HOST: '127.0.0.1',
+        PORT: 8765,
+        TIMEOUT: 2000,
+        POLL_INTERVAL: 1000,
+        MAX_WAIT: 60000,
+        BUSY_RETRIES: 2,
+        BUSY_RETRY_DELAY: 1000
     }
 };
 
@@ -48,6 +59,8 @@ class IROSAutomation {
         this.page = null;
         this.processedCompanies = [];
         this.failedCompanies = [];
+        this.pythonJobs = [];
+        this.abandonedPythonJobs = [];
         
         // readline 인터페이스 설정
         this.rl = readline.createInterface({
@@ -2228,8 +2241,107 @@ class IROSAutomation {
         }
     }
 
+    // Python 잡 러너 HTTP 요청 (JSON)
+    requestJobRunner(method, urlPath, payload = null) {
+        return new Promise((resolve, reject) => {
+            const body = payload ? JSON.stringify(payload) : null;
+            const req = http.request({
+                host: CONFIG.JOB_RUNNER.HOST,
+                port: CONFIG.JOB_RUNNER.PORT,
+                path: urlPath,
+                method,
+                timeout: CONFIG.JOB_RUNNER.TIMEOUT,
+                headers: body ? { 'Content-Type': 'application/json', 'Content-Length': Buffer.byteLength(body) } : {}
+            }, (res) => {
+                let data = '';
+                res.on('data', (chunk) => data += chunk);
+                res.on('end', () => {
+                    let json = null;
+                    try {
+                        json = JSON.parse(data);
+                    } catch (e) {
+                        if (res.statusCode < 400) return reject(e);
+                    }
+                    if (res.statusCode >= 400) {
+                        const error = new Error((json && json.error) || `잡 러너 오류: ${res.statusCode}`);
+                        error.statusCode = res.statusCode;
+                        return reject(error);
+                    }
+                    resolve(json);
+                });
+            });
+            req.on('timeout', () => {
+                const error = new Error('잡 러너 응답 시간 초과');
+                error.code = 'ETIMEDOUT';
+                req.destroy(error);
+            });
+            req.on('error', reject);
+            if (body) req.write(body);
+            req.end();
+        });
+    }
+
+    // Python 잡 러너에 작업 제출 (완료를 기다리지 않음)
+    async submitPythonJob(type, params = {}) {
+        const job = await this.requestJobRunner('POST', '/jobs', { type, params });
+        this.pythonJobs.push(job.job_id);
+        console.log(`🐍 Python 작업 제출: ${type} (${job.job_id})`);
+        return job.job_id;
+    }
+
+    // Python 작업이 끝날 때까지 상태 폴링 (deadline을 넘기면 포기)
+    async waitForPythonJob(jobId, deadline = Date.now() + CONFIG.JOB_RUNNER.MAX_WAIT) {
+        while (true) {
+            const job = await this.requestJobRunner('GET', `/jobs/${jobId}`);
+            if (job.status === 'done') return job.result;
+            if (job.status === 'failed') throw new Error(job.error);
+            if (Date.now() >= deadline) {
+                this.abandonedPythonJobs.push(jobId);
+                throw new Error(`대기 시간이 끝나 대기를 포기합니다 (상태: ${job.status})`);
+            }
+            await new Promise((resolve) => setTimeout(resolve, Math.min(CONFIG.JOB_RUNNER.POLL_INTERVAL, Math.max(deadline - Date.now(), 0))));
+        }
+    }
+
+    // 제출한 Python 작업 결과 모두 확인 (전체 대기 시간은 MAX_WAIT까지)
+    async waitForPythonJobs() {
+        const jobIds = this.pythonJobs.splice(0);
+        const deadline = Date.now() + CONFIG.JOB_RUNNER.MAX_WAIT;
+        for (const jobId of jobIds) {
+            try {
+                const result = await this.waitForPythonJob(jobId, deadline);
+                console.log(`✅ Python 작업 완료 (${jobId}):`, JSON.stringify(result));
+            } catch (error) {
+                console.log(`❌ Python 작업 실패 (${jobId}):`, error.message);
+            }
+        }
+    }
+
     // change.py 실행
     async runChangePy() {
+        // 잡 러너가 실행 중이면 파일명 변경 작업만 제출하고 바로 브라우저 작업을 계속함
+        for (let attempt = 0; ; attempt++) {
+            try {
+                await this.submitPythonJob('rename');
+                return;
+            } catch (error) {
+                // 대기열이 가득 찬 경우(429)는 작업이 접수되지 않았으므로 잠시 후 다시 제출
+                if (error.statusCode === 429 && attempt < CONFIG.JOB_RUNNER.BUSY_RETRIES) {
+                    console.log('⏳ Python 잡 러너 대기열이 가득 차 잠시 후 다시 제출합니다.');
+                    await new Promise((resolve) => setTimeout(resolve, CONFIG.JOB_RUNNER.BUSY_RETRY_DELAY));
+                    continue;
+                }
+                // 연결 후 응답을 받지 못한 경우(시간 초과 등)는 작업이 접수됐을 수 있으므로
+                // 같은 PDF를 두 번 바꾸지 않도록 직접 실행하지 않음
+                if (!error.statusCode && error.code !== 'ECONNREFUSED') {
+                    console.log('❌ Python 잡 러너 작업 제출 실패:', error.message);
+                    return;
+                }
+                console.log(`⚠️ Python 잡 러너에 작업을 제출할 수 없어 change.py를 직접 실행합니다: ${error.message}`);
+                break;
+            }
+        }
+
         try {
             console.log('🐍 change.py 실행 중...');
             
@@ -2294,6 +2406,13 @@ class IROSAutomation {
         try {
             console.log('🧹 리소스 정리 중...');
             
+        if (this.pythonJobs.length > 0) {
+            await this.waitForPythonJobs();
+        }
+        if (this.abandonedPythonJobs.length > 0) {
+            console.log(`⚠️ 완료를 확인하지 못한 Python 작업 ${this.abandonedPythonJobs.length}개 (잡 러너에서 계속 실행될 수 있음):`,
+                this.abandonedPythonJobs.join(', '));
+        }
         if (this.context) {
             await this.context.close();
                 console.log('✅ 브라우저 컨텍스트 정리 완료');
@@ -0,0 +1,452 @@
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import tempfile
+import threading
+import subprocess
+import importlib.util
+import urllib.request
+from datetime import datetime
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import change
+
+# 잡 러너 설정
+JOB_RUNNER_HOST = "127.0.0.1"
+JOB_RUNNER_PORT = 8765
+MAX_WORKERS = 4               # 동시에 실행할 작업 수
+MAX_PENDING_JOBS = 200        # 대기 + 실행 중 작업 최대 수 (넘으면 429 응답)
+RESULT_TTL_SECONDS = 600      # 완료된 작업 결과 보관 시간
+MAX_RETAINED_JOBS = 1000      # 완료된 작업 결과 최대 보관 수
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+VOICE_PIPELINE_PATH = os.path.join(CURRENT_DIR, "new_ai_fixed copy.py")
+
+_voice_module = None
+_voice_lock = threading.Lock()
+_rename_lock = threading.Lock()
+
+def _load_voice_pipeline():
+    """음성 대화 모듈을 처음 사용할 때 한 번만 불러오는 함수 (파일명에 공백이 있어 직접 로드)"""
+    global _voice_module
+    with _voice_lock:
+        if _voice_module is None:
+            spec = importlib.util.spec_from_file_location("new_ai_fixed", VOICE_PIPELINE_PATH)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            _voice_module = module
+        return _voice_module
+
+# ===== 작업 종류별 처리 함수 =====
+
+def prepare_rename_job(params):
+    """
+    파일명 변경 작업 등록 시점에 대상 파일을 고정하는 함수
+    (작업이 대기하는 동안 다음 PDF가 다운로드되어도 등록 당시의 최신 파일을 변경)
+    """
+    if params.get("pdf_path"):
+        return params
+    download_folder = change.get_download_folder()
+    if not os.path.exists(download_folder):
+        return params
+    pdf_files = [f for f in os.listdir(download_folder) if f.lower().endswith(".pdf")]
+    if not pdf_files:
+        return params
+    latest_file = max(pdf_files, key=lambda x: os.path.getmtime(os.path.join(download_folder, x)))
+    return dict(params, pdf_path=os.path.join(download_folder, latest_file))
+
+def run_extract_job(params):
+    """
+    상호명/등록번호 추출 작업
+    params: {"pdf_path": 경로} 또는 {"pdf_paths": [경로, ...]}
+    """
+    if "pdf_paths" in params:
+        return change.extract_certificates(params["pdf_paths"])
+    if "pdf_path" not in params:
+        raise ValueError("pdf_path 또는 pdf_paths가 필요합니다.")
+    return change.extract_certificate_info(params["pdf_path"])
+
+def run_rename_job(params):
+    """
+    yymmdd_상호명_등록번호 형식 파일명 변경 작업
+    params: {"pdf_path": 경로} (없으면 .playwright-mcp 폴더의 최신 PDF, change.py 메뉴 1번과 동일)
+    """
+    if params.get("pdf_path"):
+        new_path = change.rename_pdf_with_company_name(params["pdf_path"])
+    else:
+        # 최신 파일 선택과 이름 변경 사이에 다른 작업이 끼어들지 않도록 직렬화
+        with _rename_lock:
+            new_path = change.auto_rename_pdf_with_company_name()
+    if not new_path:
+        raise RuntimeError("파일명을 변경할 수 없습니다.")
+    return {"path": new_path, "file": os.path.basename(new_path)}
+
+def run_index_job(params):
+    """
+    폴더의 모든 PDF 상호명/등록번호 목록 작성 작업
+    params: {"folder": 경로} (없으면 .playwright-mcp 폴더)
+    """
+    return change.index_certificates(params.get("folder"))
+
+def _resolve_path(file_path):
+    """상대 경로는 러너 실행 위치가 아닌 이 파일의 폴더 기준으로 해석"""
+    return file_path if os.path.isabs(file_path) else os.path.join(CURRENT_DIR, file_path)
+
+def run_voice_job(params):
+    """
+    음성 대화(STT → LLM → TTS) 작업
+    params: {"audio_file_path": 경로, "persona_type": 페르소나, "session_id": 세션 ID}
+    """
+    voice = _load_voice_pipeline()
+    # 동시에 끝나는 작업끼리 음성 파일을 덮어쓰지 않도록 작업마다 다른 파일명 사용
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_file = os.path.join(CURRENT_DIR, f"ai_response_{timestamp}_{uuid.uuid4().hex[:8]}.mp3")
+    transcript, ai_response, audio_file = voice.complete_conversation_system(
+        _resolve_path(params.get("audio_file_path", "audio_file.m4a")),
+        params.get("persona_type", "손녀딸"),
+        session_id=params.get("session_id"),
+        output_file=output_file
+    )
+    if not transcript:
+        raise RuntimeError("음성 대화 처리에 실패했습니다.")
+    return {"transcript": transcript, "response": ai_response, "audio_file": audio_file}
+
+JOB_HANDLERS = {
+    "extract": run_extract_job,
+    "rename": run_rename_job,
+    "index": run_index_job,
+    "voice": run_voice_job,
+}
+
+# 작업 등록 시점에 실행할 준비 함수
+JOB_PREPARERS = {
+    "rename": prepare_rename_job,
+}
+
+class QueueFullError(Exception):
+    """대기 중인 작업이 MAX_PENDING_JOBS를 넘었을 때 발생"""
+
+class JobRunner:
+    """
+    제한된 작업자 풀로 작업을 비동기 실행하고 상태와 결과를 보관하는 클래스
+
+    작업 상태: queued → running → done / failed
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS, max_pending=MAX_PENDING_JOBS,
+                 result_ttl=RESULT_TTL_SECONDS, max_retained=MAX_RETAINED_JOBS, handlers=None, preparers=None):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self.max_retained = max_retained
+        self.handlers = handlers or JOB_HANDLERS
+        self.preparers = JOB_PREPARERS if preparers is None else preparers
+        self.jobs = {}
+        self.active = 0
+        self.lock = threading.Lock()
+
+    def submit(self, job_type, params=None):
+        """
+        작업 등록
+
+        Returns:
+            dict: 작업 상태
+
+        Raises:
+            ValueError: 알 수 없는 작업 종류
+            QueueFullError: 대기 작업이 너무 많을 때
+        """
+        if job_type not in self.handlers:
+            raise ValueError(f"알 수 없는 작업 종류입니다: {job_type}")
+        params = params or {}
+        if job_type in self.preparers:
+            params = self.preparers[job_type](params)
+
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "type": job_type,
+            "params": params,
+            "status": "queued",
+            "result": None,
+            "error": None,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        with self.lock:
+            self._purge()
+            if self.active >= self.max_pending:
+                raise QueueFullError(f"대기 중인 작업이 너무 많습니다 ({self.active}개)")
+            self.active += 1
+            self.jobs[job["job_id"]] = job
+        self.executor.submit(self._run, job)
+        return self._snapshot(job)
+
+    def _run(self, job):
+        with self.lock:
+            job["status"] = "running"
+            job["started_at"] = time.time()
+        try:
+            result = self.handlers[job["type"]](job["params"])
+            status, error = "done", None
+        except Exception as e:
+            result, status, error = None, "failed", str(e)
+        with self.lock:
+            job["result"] = result
+            job["error"] = error
+            job["status"] = status
+            job["finished_at"] = time.time()
+            self.active -= 1
+
+    def _purge(self):
+        """보관 시간이 지났거나 보관 수를 넘은 완료 작업 삭제 (lock 안에서 호출)"""
+        now = time.time()
+        finished = [job for job in self.jobs.values() if job["finished_at"] is not None]
+        finished.sort(key=lambda job: job["finished_at"])
+        overflow = len(finished) - self.max_retained
+        for i, job in enumerate(finished):
+            if i < overflow or now - job["finished_at"] > self.result_ttl:
+                del self.jobs[job["job_id"]]
+
+    def _snapshot(self, job):
+        with self.lock:
+            return dict(job)
+
+    def get(self, job_id):
+        """작업 상태 조회 (없으면 None)"""
+        with self.lock:
+            self._purge()
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list(self):
+        """보관 중인 작업 목록 (결과 제외)"""
+        with self.lock:
+            self._purge()
+            return [{key: job[key] for key in ("job_id", "type", "status", "created_at", "finished_at")}
+                    for job in self.jobs.values()]
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    """
+    잡 러너 HTTP API (JSON)
+        POST /jobs          {"type": "extract|rename|index|voice", "params": {...}} → 202 작업 상태
+        GET  /jobs          보관 중인 작업 목록
+        GET  /jobs/<job_id> 작업 상태/결과
+        GET  /health        러너 상태
+    """
+
+    def _origin_allowed(self):
+        """
+        브라우저 페이지에서 보낸 요청 차단
+        (Origin 헤더가 없거나 이 러너 자신의 주소일 때만 허용)
+        """
+        origin = self.headers.get("Origin")
+        if not origin:
+            return True
+        parsed = urlparse(origin)
+        return parsed.hostname in ("127.0.0.1", "localhost") and parsed.port == self.server.server_address[1]
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if not self._origin_allowed():
+            self._send_json(403, {"error": "허용되지 않은 Origin입니다."})
+            return
+        if urlparse(self.path).path.rstrip("/") != "/jobs":
+            self._send_json(404, {"error": "없는 경로입니다."})
+            return
+        if self.headers.get_content_type() != "application/json":
+            self._send_json(415, {"error": "Content-Type은 application/json이어야 합니다."})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length).decode("utf-8") or "{}")
+            job = self.server.runner.submit(request.get("type"), request.get("params"))
+        except QueueFullError as e:
+            self._send_json(429, {"error": str(e)})
+            return
+        except (ValueError, AttributeError) as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        except Exception as e:
+            self._send_json(500, {"error": f"작업 등록 중 오류 발생: {e}"})
+            return
+        self._send_json(202, job)
+
+    def do_GET(self):
+        if not self._origin_allowed():
+            self._send_json(403, {"error": "허용되지 않은 Origin입니다."})
+            return
+        path = urlparse(self.path).path.rstrip("/")
+        runner = self.server.runner
+        if path == "/health":
+            self._send_json(200, {"status": "ok", "active": runner.active})
+        elif path == "/jobs":
+            self._send_json(200, {"jobs": runner.list()})
+        elif path.startswith("/jobs/"):
+            job = runner.get(path[len("/jobs/"):])
+            if job:
+                self._send_json(200, job)
+            else:
+                self._send_json(404, {"error": "작업을 찾을 수 없습니다."})
+        else:
+            self._send_json(404, {"error": "없는 경로입니다."})
+
+    def log_message(self, format, *args):
+        pass
+
+def start_job_runner(host=JOB_RUNNER_HOST, port=JOB_RUNNER_PORT, runner=None):
+    """
+    잡 러너 HTTP 서버를 백그라운드 스레드로 시작하는 함수
+
+    Returns:
+        ThreadingHTTPServer: 실행 중인 서버 (server.runner로 JobRunner 접근)
+    """
+    server = ThreadingHTTPServer((host, port), JobRequestHandler)
+    server.daemon_threads = True
+    server.runner = runner or JobRunner()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+# ===== 벤치마크 (spawn 방식과 비교) =====
+
+CHANGE_SCRIPT_PATH = os.path.join(CURRENT_DIR, "change.py")
+
+def _make_rename_sandboxes(pdf_paths, root):
+    """
+    파일명 변경 벤치마크용 작업 폴더 생성 (원본 PDF는 변경하지 않음)
+    작업마다 change.py 복사본과 .playwright-mcp/PDF 복사본 하나를 둔 폴더를 만듦
+
+    Returns:
+        list: (change.py 복사본 경로, PDF 복사본 경로) 목록
+    """
+    sandboxes = []
+    for i, pdf_path in enumerate(pdf_paths):
+        sandbox = os.path.join(root, f"job_{i:04d}")
+        download_folder = os.path.join(sandbox, ".playwright-mcp")
+        os.makedirs(download_folder)
+        script_path = os.path.join(sandbox, "change.py")
+        shutil.copy(CHANGE_SCRIPT_PATH, script_path)
+        pdf_copy = os.path.join(download_folder, os.path.basename(pdf_path))
+        shutil.copy(pdf_path, pdf_copy)
+        sandboxes.append((script_path, pdf_copy))
+    return sandboxes
+
+def _spawn_change_py(script_path):
+    """firebase_admin.js의 runPythonScript처럼 change.py를 새 프로세스로 실행하고 메뉴 1번(자동 파일명 변경) 선택"""
+    result = subprocess.run([sys.executable, script_path], input="1\n", cwd=os.path.dirname(script_path),
+                            capture_output=True, text=True, encoding="utf-8")
+    return result.returncode == 0 and "작업 완료" in result.stdout
+
+def _request_json(url, payload=None):
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read().decode("utf-8"))
+
+def benchmark_against_spawn(pdf_folder=None, count=100, poll_interval=0.05):
+    """
+    인증서 count개 파일명 변경을 spawn 방식(작업마다 change.py 프로세스 실행)과
+    잡 러너 방식(HTTP로 제출 후 상태 폴링)으로 처리해 처리량을 비교하는 함수
+    spawn 방식은 순차 실행과 작업자 MAX_WORKERS개 병렬 실행을 모두 측정합니다.
+    원본 PDF 대신 임시 폴더의 복사본을 변경합니다.
+
+    Args:
+        pdf_folder (str): PDF 폴더 (없으면 .playwright-mcp 폴더, 파일이 부족하면 반복 사용)
+        count (int): 처리할 인증서 수
+        poll_interval (float): 상태 폴링 간격 (초)
+
+    Returns:
+        dict: {"spawn": 초, "spawn_parallel": 초, "runner": 초}
+    """
+    pdf_folder = pdf_folder or change.get_download_folder()
+    pdf_files = sorted(f for f in os.listdir(pdf_folder) if f.lower().endswith(".pdf"))
+    if not pdf_files:
+        print("❌ 벤치마크할 PDF 파일이 없습니다.")
+        return None
+    pdf_paths = [os.path.join(pdf_folder, pdf_files[i % len(pdf_files)]) for i in range(count)]
+
+    print(f"📊 인증서 {count}개 파일명 변경 처리량 비교 (PDF {len(pdf_files)}개 반복 사용)")
+    if not hasattr(change.pdfplumber, "__version__"):
+        print("⚠️ 실제 pdfplumber가 아닌 대체 모듈로 실행 중입니다. PDF 파싱 시간은 측정에 포함되지 않습니다.")
+
+    work_root = tempfile.mkdtemp(prefix="job_runner_benchmark_")
+    try:
+        # spawn 방식 (순차): 인증서마다 change.py를 실행하고 끝날 때까지 대기
+        sandboxes = _make_rename_sandboxes(pdf_paths, os.path.join(work_root, "spawn"))
+        start = time.perf_counter()
+        spawn_ok = sum(_spawn_change_py(script_path) for script_path, _ in sandboxes)
+        spawn_seconds = time.perf_counter() - start
+
+        # spawn 방식 (병렬): 잡 러너와 같은 수의 프로세스를 동시에 실행
+        sandboxes = _make_rename_sandboxes(pdf_paths, os.path.join(work_root, "spawn_parallel"))
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            spawn_parallel_ok = sum(executor.map(_spawn_change_py, [script_path for script_path, _ in sandboxes]))
+        spawn_parallel_seconds = time.perf_counter() - start
+
+        # 잡 러너 방식: 모두 제출한 뒤 상태 폴링
+        sandboxes = _make_rename_sandboxes(pdf_paths, os.path.join(work_root, "runner"))
+        server = start_job_runner(port=0)
+        base_url = f"http://{JOB_RUNNER_HOST}:{server.server_address[1]}"
+        try:
+            start = time.perf_counter()
+            job_ids = [_request_json(f"{base_url}/jobs", {"type": "rename", "params": {"pdf_path": pdf_copy}})["job_id"]
+                       for _, pdf_copy in sandboxes]
+            pending = set(job_ids)
+            runner_ok = 0
+            while pending:
+                time.sleep(poll_interval)
+                for job_id in list(pending):
+                    status = _request_json(f"{base_url}/jobs/{job_id}")["status"]
+                    if status in ("done", "failed"):
+                        pending.discard(job_id)
+                        runner_ok += status == "done"
+            runner_seconds = time.perf_counter() - start
+        finally:
+            server.shutdown()
+            server.runner.shutdown()
+    finally:
+        shutil.rmtree(work_root, ignore_errors=True)
+
+    print(f"\n   spawn 방식 (순차):      {spawn_seconds:.2f}초 ({count / spawn_seconds:.1f}개/초, 성공 {spawn_ok}개)")
+    print(f"   spawn 방식 (병렬 {MAX_WORKERS}개): {spawn_parallel_seconds:.2f}초 "
+          f"({count / spawn_parallel_seconds:.1f}개/초, 성공 {spawn_parallel_ok}개)")
+    print(f"   잡 러너 방식 ({MAX_WORKERS}개):   {runner_seconds:.2f}초 ({count / runner_seconds:.1f}개/초, 성공 {runner_ok}개)")
+    return {"spawn": spawn_seconds, "spawn_parallel": spawn_parallel_seconds, "runner": runner_seconds}
+
+def main():
+    """메인 실행 함수 - 잡 러너 서버 실행"""
+    if len(sys.argv) > 1 and sys.argv[1] == "--benchmark":
+        folder = sys.argv[2] if len(sys.argv) > 2 else None
+        count = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+        benchmark_against_spawn(folder, count)
+        return
+
+    server = start_job_runner()
+    print(f"🐍 Python 잡 러너 실행 중: http://{JOB_RUNNER_HOST}:{JOB_RUNNER_PORT}")
+    print(f"   작업자 {MAX_WORKERS}개, 최대 대기 작업 {MAX_PENDING_JOBS}개")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\n잡 러너를 종료합니다.")
+        server.shutdown()
+        server.runner.shutdown()
+
+if __name__ == "__main__":
+    main()